@@ -1,4 +1,4 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from mcp_video_service.services.video_service import VideoService
 
 mcp = FastMCP("video-service")
@@ -15,12 +15,19 @@ async def audio_download(url: str) -> str:
     return await video_service.download_audio(url)
 
 @mcp.tool()
-async def audio_extract(audio_path: str) -> str:
+async def audio_extract(audio_path: str, ctx: Context) -> str:
     """从音频或视频文件中提取文字内容"""
-    return await video_service.extract_text(audio_path)
+    async def report_segment(segment):
+        # 以已识别的音频时长（秒）作为进度；文字只在最终结果中返回，避免重复推送整篇内容
+        await ctx.report_progress(segment.end_time / 1000)
+
+    return await video_service.extract_text(audio_path, on_segment=report_segment)
 
 def main():
-    mcp.run() 
+    try:
+        mcp.run()
+    finally:
+        video_service.close()
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
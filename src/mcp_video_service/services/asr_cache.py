@@ -0,0 +1,388 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .asr_data import ASRData, ASRDataSeg
+except ImportError:
+    from asr_data import ASRData, ASRDataSeg
+
+logger = logging.getLogger(__name__)
+
+# 未指定缓存目录时使用的默认位置
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "mcp-video", "asr_cache")
+
+# 内存层最多保留的条目数
+DEFAULT_MEMORY_SIZE = 1024
+# 缓存条目的有效期（秒）
+DEFAULT_TTL = 7 * 86400
+# 磁盘层的容量上限（字节），可通过 CACHE_SIZE_GB 环境变量调整
+DEFAULT_SIZE_LIMIT = int(float(os.getenv("CACHE_SIZE_GB", "10")) * (1 << 30))
+# PCM 缓存的容量上限（字节），可通过 PCM_CACHE_SIZE_GB 环境变量调整
+DEFAULT_PCM_SIZE_LIMIT = int(float(os.getenv("PCM_CACHE_SIZE_GB", "5")) * (1 << 30))
+
+# 磁盘占用在写入时增量统计，每隔一定写入次数或时间做一次全量扫描，校正其他进程带来的偏差
+SWEEP_INTERVAL_WRITES = 256
+SWEEP_INTERVAL_SECONDS = 3600
+# 超过容量上限时淘汰到上限的该比例，避免之后每次写入都触发全量扫描
+_LOW_WATER = 0.9
+
+
+def pcm_sha256(pcm: np.ndarray) -> str:
+    """计算解码后 PCM 的 SHA256，同一音源的不同编码格式得到相同的缓存键"""
+    return hashlib.sha256(np.ascontiguousarray(pcm, dtype=np.float32).data).hexdigest()
+
+
+def file_crc32(source: Union[str, BinaryIO], chunk_size: int = 1 << 20) -> str:
+    """
+    分块计算文件的 CRC32，避免整体读入内存
+
+    上传接口校验的是标准 CRC32（IEEE 多项式），不能换成 CRC32C；
+    直接调用 zlib.crc32，在 zlib-ng 等构建中会使用 PCLMULQDQ/ARMv8 CRC 指令加速。
+
+    Args:
+        source: 文件路径，或已打开的二进制文件对象（从当前位置读到末尾，不会关闭）
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        str: 8 位十六进制的 CRC32
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return file_crc32(f, chunk_size)
+    crc32_value = 0
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        crc32_value = zlib.crc32(chunk, crc32_value)
+    return f"{crc32_value & 0xFFFFFFFF:08x}"
+
+
+class _CacheState:
+    """同一缓存目录共享的内存层、命中统计和磁盘占用（每次识别都会新建缓存实例）"""
+
+    def __init__(self, memory_size: int):
+        self.memory_size = memory_size
+        self.memory: "OrderedDict[str, Tuple[float, ASRData]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # 磁盘层总字节数，None 表示尚未扫描
+        self.disk_size: Optional[int] = None
+        self.writes_since_sweep = 0
+        self.last_sweep = 0.0
+        self.lock = threading.Lock()
+
+
+_states: Dict[str, _CacheState] = {}
+_states_lock = threading.Lock()
+
+
+def _get_state(cache_dir: str, memory_size: int) -> _CacheState:
+    with _states_lock:
+        state = _states.get(cache_dir)
+        if state is None:
+            state = _CacheState(memory_size)
+            _states[cache_dir] = state
+        return state
+
+
+class _DiskCache:
+    """
+    磁盘缓存基类
+
+    每个缓存键对应一个文件，按修改时间判断过期，命中时刷新修改时间，
+    超过容量上限时淘汰最久未使用的条目。磁盘占用在写入时增量统计，
+    只在超过上限或定期时才全量扫描目录。
+    """
+
+    # 缓存文件扩展名和日志中使用的缓存名称
+    SUFFIX = ""
+    NAME = ""
+
+    def __init__(
+        self, cache_dir: str, ttl: float, size_limit: int, memory_size: int = 0
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.size_limit = size_limit
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._state = _get_state(self.cache_dir, memory_size)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{self.SUFFIX}")
+
+    def _fresh_path(self, key: str) -> Optional[str]:
+        """返回未过期的缓存文件路径，过期文件直接删除"""
+        path = self._path(key)
+        stat = os.stat(path)
+        if time.time() - stat.st_mtime > self.ttl:
+            os.unlink(path)
+            self._account(-stat.st_size)
+            return None
+        return path
+
+    def _write(self, key: str, writer: Callable[[BinaryIO], None]) -> None:
+        """先写临时文件再原子替换，避免并发读到半写入的文件"""
+        path = self._path(key)
+        try:
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+                f.flush()
+                new_size = os.fstat(f.fileno()).st_size
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入 {self.NAME} 缓存失败 {key}: {str(e)}")
+            self._unlink(tmp_path)
+            return
+        self._account(new_size - old_size)
+        if self._needs_sweep():
+            self._evict()
+
+    def _account(self, delta: int) -> None:
+        """增量更新磁盘层占用"""
+        state = self._state
+        with state.lock:
+            if state.disk_size is not None:
+                state.disk_size += delta
+
+    def _needs_sweep(self) -> bool:
+        """写入后判断是否需要全量扫描：尚未扫描、超过容量上限，或距上次扫描已有较多写入/较长时间"""
+        state = self._state
+        with state.lock:
+            state.writes_since_sweep += 1
+            return (
+                state.disk_size is None
+                or state.disk_size > self.size_limit
+                or state.writes_since_sweep >= SWEEP_INTERVAL_WRITES
+                or time.monotonic() - state.last_sweep > SWEEP_INTERVAL_SECONDS
+            )
+
+    def _evict(self) -> None:
+        """全量扫描：删除过期条目，并在超过容量上限时按最久未使用的顺序淘汰"""
+        now = time.time()
+        entries = []
+        total_size = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.SUFFIX):
+                        continue
+                    stat = entry.stat()
+                    if now - stat.st_mtime > self.ttl:
+                        self._unlink(entry.path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        except OSError as e:
+            logger.warning(f"清理 {self.NAME} 缓存失败: {str(e)}")
+            return
+
+        if total_size > self.size_limit:
+            target = self.size_limit * _LOW_WATER
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= target:
+                    break
+                self._unlink(path)
+                total_size -= size
+
+        state = self._state
+        with state.lock:
+            state.disk_size = total_size
+            state.writes_since_sweep = 0
+            state.last_sweep = time.monotonic()
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class ASRCache(_DiskCache):
+    """
+    ASR 结果缓存
+
+    内存层为 LRU + TTL，磁盘层每个缓存键对应一个 JSON 文件。
+    """
+
+    SUFFIX = ".json"
+    NAME = "ASR"
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        size_limit: int = DEFAULT_SIZE_LIMIT,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认使用系统临时目录下的 mcp-video/asr_cache
+            ttl: 缓存有效期（秒）
+            size_limit: 磁盘层容量上限（字节）
+            memory_size: 内存层最多保留的条目数
+        """
+        super().__init__(cache_dir or DEFAULT_CACHE_DIR, ttl, size_limit, memory_size)
+
+    def _record(self, hit: bool) -> None:
+        """记录命中情况并输出命中率"""
+        state = self._state
+        with state.lock:
+            if hit:
+                state.hits += 1
+            else:
+                state.misses += 1
+            total = state.hits + state.misses
+            logger.debug(
+                "ASR 缓存命中率: %d/%d (%.1f%%)", state.hits, total, state.hits / total * 100
+            )
+
+    def _get_memory(self, key: str) -> Optional[ASRData]:
+        state = self._state
+        with state.lock:
+            item = state.memory.get(key)
+            if item is None:
+                return None
+            stored_at, asr_data = item
+            if time.time() - stored_at > self.ttl:
+                del state.memory[key]
+                return None
+            state.memory.move_to_end(key)
+            return asr_data
+
+    def _set_memory(self, key: str, asr_data: ASRData) -> None:
+        state = self._state
+        with state.lock:
+            state.memory[key] = (time.time(), asr_data)
+            state.memory.move_to_end(key)
+            while len(state.memory) > state.memory_size:
+                state.memory.popitem(last=False)
+
+    def _get_disk(self, key: str) -> Optional[ASRData]:
+        try:
+            path = self._fresh_path(key)
+            if path is None:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # 刷新修改时间，作为 LRU 淘汰的依据
+            os.utime(path)
+            return ASRData(
+                text=data["text"],
+                segments=[ASRDataSeg(*seg) for seg in data["segments"]],
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"读取 ASR 缓存失败 {key}: {str(e)}")
+            return None
+
+    def get(self, key: str) -> Optional[ASRData]:
+        """
+        读取缓存，磁盘层命中时提升到内存层
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[ASRData]: 命中时返回识别结果，否则返回 None
+        """
+        asr_data = self._get_memory(key)
+        if asr_data is None:
+            asr_data = self._get_disk(key)
+            if asr_data is not None:
+                self._set_memory(key, asr_data)
+        self._record(asr_data is not None)
+        return asr_data
+
+    def set(self, key: str, asr_data: ASRData) -> None:
+        """
+        写入缓存（同时写入内存层和磁盘层）
+
+        Args:
+            key: 缓存键
+            asr_data: 识别结果
+        """
+        self._set_memory(key, asr_data)
+        data = {
+            "text": asr_data.text,
+            "segments": [
+                [seg.text, seg.start_time, seg.end_time] for seg in asr_data.segments
+            ],
+        }
+        self._write(
+            key, lambda f: f.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        )
+
+
+class PCMCache(_DiskCache):
+    """解码后 PCM 的磁盘缓存，每个缓存键对应一个 float32 原始数据文件"""
+
+    SUFFIX = ".f32"
+    NAME = "PCM"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: float = DEFAULT_TTL,
+        size_limit: int = DEFAULT_PCM_SIZE_LIMIT,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期（秒）
+            size_limit: 容量上限（字节）
+        """
+        super().__init__(cache_dir, ttl, size_limit)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[np.ndarray]: 命中时返回 PCM 数据，否则返回 None
+        """
+        try:
+            path = self._fresh_path(key)
+            if path is None:
+                return None
+            pcm = np.fromfile(path, dtype=np.float32)
+            # 刷新修改时间，作为 LRU 淘汰的依据
+            os.utime(path)
+            return pcm
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取 PCM 缓存失败 {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, pcm: np.ndarray) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            pcm: 16kHz 单声道 float32 PCM
+        """
+        self._write(key, lambda f: f.write(np.ascontiguousarray(pcm, dtype=np.float32).data))
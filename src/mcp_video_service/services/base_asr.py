@@ -1,19 +1,57 @@
 import hashlib
+import io
 import logging
 import os
+import threading
 import time
-import binascii
 from abc import ABC, abstractmethod
-from typing import Any, Callable, List, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
 
 try:
+    from .asr_cache import ASRCache, file_crc32
     from .asr_data import ASRData, ASRDataSeg
 except ImportError:
+    from asr_cache import ASRCache, file_crc32
     from asr_data import ASRData, ASRDataSeg
 
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, capacity: int, period: float):
+        """
+        Args:
+            capacity: 桶容量，即时间窗口内允许的最大调用次数
+            period: 时间窗口（秒）
+        """
+        self.capacity = capacity
+        self.rate = capacity / period  # 每秒补充的令牌数
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预定一个令牌
+
+        Returns:
+            float: 调用方在使用该令牌前需要等待的秒数，0 表示无需等待
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # 令牌不足时允许透支，每个调用方按透支量排队等待
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
 class BaseASR(ABC):
     """基础 ASR 类，所有 ASR 实现都应继承此类"""
 
@@ -21,71 +59,71 @@ class BaseASR(ABC):
     RATE_LIMIT_CALLS = 10  # 每个时间窗口的最大调用次数
     RATE_LIMIT_PERIOD = 60  # 时间窗口（秒）
 
-    def __init__(self, audio_path: Union[str, bytes], use_cache: bool = False):
+    # 流式读取文件时的块大小
+    READ_CHUNK_SIZE = 1 << 20
+
+    # 每个 ASR 实现类共享一个令牌桶（每次识别都会新建实例）
+    _rate_limiters: Dict[type, TokenBucket] = {}
+    _rate_limiters_lock = threading.Lock()
+
+    def __init__(
+        self,
+        audio_path: Union[str, bytes],
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None,
+    ):
         """
         初始化 ASR 实例
 
         Args:
             audio_path: 音频文件路径或音频二进制数据
             use_cache: 是否使用缓存
+            cache_dir: 缓存目录，为空时使用默认目录
         """
         self.audio_path = audio_path
         self.use_cache = use_cache
-        self.file_binary = self._load_audio_file()
+        self.cache_dir = cache_dir
+        self.file_size = self._load_audio_file()
         self.crc32_hex = self._calculate_crc32()
-        self._last_call_time = 0
-        self._call_count = 0
 
-    def _load_audio_file(self) -> bytes:
-        """加载音频文件"""
+    def _load_audio_file(self) -> int:
+        """校验音频输入并返回其大小（字节），文件内容不会整体读入内存"""
         if isinstance(self.audio_path, bytes):
-            return self.audio_path
+            return len(self.audio_path)
         elif isinstance(self.audio_path, str):
             if not os.path.exists(self.audio_path):
                 raise FileNotFoundError(f"音频文件不存在: {self.audio_path}")
-            with open(self.audio_path, "rb") as f:
-                return f.read()
+            return os.path.getsize(self.audio_path)
         else:
             raise TypeError("audio_path 必须是文件路径或二进制数据")
 
+    def _open_audio(self) -> BinaryIO:
+        """以文件对象形式打开音频，用于流式读取和上传"""
+        if isinstance(self.audio_path, bytes):
+            return io.BytesIO(self.audio_path)
+        return open(self.audio_path, "rb")
+
     def _calculate_crc32(self) -> str:
         """计算文件的 CRC32 校验和"""
-        # 使用binascii计算CRC32，确保与AWS S3兼容
-        crc32_value = binascii.crc32(self.file_binary) & 0xFFFFFFFF
-        return f"{crc32_value:08x}"
-
-    @staticmethod
-    def _crc32_table():
-        """生成 CRC32 查找表"""
-        table = []
-        for i in range(256):
-            crc = i
-            for _ in range(8):
-                if crc & 1:
-                    crc = (crc >> 1) ^ 0xEDB88320
-                else:
-                    crc >>= 1
-            table.append(crc)
-        return table
-
-    _crc32_table = _crc32_table()
+        with self._open_audio() as f:
+            return file_crc32(f, self.READ_CHUNK_SIZE)
+
+    @classmethod
+    def _get_rate_limiter(cls) -> TokenBucket:
+        """获取当前 ASR 实现类共享的令牌桶"""
+        with BaseASR._rate_limiters_lock:
+            limiter = BaseASR._rate_limiters.get(cls)
+            if limiter is None:
+                limiter = TokenBucket(cls.RATE_LIMIT_CALLS, cls.RATE_LIMIT_PERIOD)
+                BaseASR._rate_limiters[cls] = limiter
+            return limiter
 
     def _check_rate_limit(self):
-        """检查速率限制"""
-        current_time = time.time()
-        if current_time - self._last_call_time > self.RATE_LIMIT_PERIOD:
-            self._last_call_time = current_time
-            self._call_count = 0
-
-        if self._call_count >= self.RATE_LIMIT_CALLS:
-            sleep_time = self.RATE_LIMIT_PERIOD - (current_time - self._last_call_time)
-            if sleep_time > 0:
-                logger.warning(f"触发速率限制，等待 {sleep_time:.1f} 秒")
-                time.sleep(sleep_time)
-                self._last_call_time = time.time()
-                self._call_count = 0
-
-        self._call_count += 1
+        """检查速率限制，令牌不足时阻塞当前线程直到可以调用"""
+        wait_time = self._get_rate_limiter().reserve()
+        if wait_time > 0:
+            logger.warning(f"触发速率限制，等待 {wait_time:.1f} 秒")
+            time.sleep(wait_time)
 
     def run(
         self, callback: Optional[Callable[[int, str], None]] = None, **kwargs: Any
@@ -100,10 +138,21 @@ class BaseASR(ABC):
         Returns:
             ASRData: 识别结果
         """
+        cache = ASRCache(self.cache_dir) if self.use_cache else None
+        if cache is not None:
+            cached = cache.get(self._get_key())
+            if cached is not None:
+                logger.info(f"命中 ASR 缓存: {self._get_key()}")
+                return cached
+
         resp_data = self._run(callback, **kwargs)
         segments = self._make_segments(resp_data)
-        text = "\n".join([seg.text for seg in segments])
-        return ASRData(text=text, segments=segments)
+        text = "\n".join(seg.text for seg in segments)
+        asr_data = ASRData(text=text, segments=segments)
+
+        if cache is not None:
+            cache.set(self._get_key(), asr_data)
+        return asr_data
 
     @abstractmethod
     def _run(
@@ -41,8 +41,9 @@ class BcutASR(BaseASR):
         audio_path: Union[str, bytes],
         use_cache: bool = True,
         need_word_time_stamp: bool = False,
+        cache_dir: Optional[str] = None,
     ):
-        super().__init__(audio_path, use_cache=use_cache)
+        super().__init__(audio_path, use_cache=use_cache, cache_dir=cache_dir)
         self.session = requests.Session()
         self.task_id: Optional[str] = None
         self.__etags: List[str] = []
@@ -61,13 +62,13 @@ class BcutASR(BaseASR):
 
     def upload(self) -> None:
         """Request upload authorization and upload audio file."""
-        if not self.file_binary:
+        if not self.file_size:
             raise ValueError("No audio data to upload")
         payload = json.dumps(
             {
                 "type": 2,
                 "name": "audio.mp3",
-                "size": len(self.file_binary),
+                "size": self.file_size,
                 "ResourceFileType": "mp3",
                 "model_id": "8",
             }
@@ -94,22 +95,21 @@ class BcutASR(BaseASR):
             self.__clips is None
             or self.__per_size is None
             or self.__upload_urls is None
-            or self.file_binary is None
         ):
             raise ValueError("Upload parameters not initialized")
 
-        for clip in range(self.__clips):
-            start_range = clip * self.__per_size
-            end_range = (clip + 1) * self.__per_size
-            resp = requests.put(
-                self.__upload_urls[clip],
-                data=self.file_binary[start_range:end_range],
-                headers=self.headers,
-            )
-            resp.raise_for_status()
-            etag = resp.headers.get("Etag")
-            if etag is not None:
-                self.__etags.append(etag)
+        # Read one part at a time so only a single clip is held in memory
+        with self._open_audio() as f:
+            for clip in range(self.__clips):
+                resp = requests.put(
+                    self.__upload_urls[clip],
+                    data=f.read(self.__per_size),
+                    headers=self.headers,
+                )
+                resp.raise_for_status()
+                etag = resp.headers.get("Etag")
+                if etag is not None:
+                    self.__etags.append(etag)
 
     def __commit_upload(self) -> None:
         """Commit the upload and get download URL."""
@@ -197,3 +197,6 @@ class BcutASR(BaseASR):
                 ASRDataSeg(u["transcript"], u["start_time"], u["end_time"])
                 for u in resp_data["utterances"]
             ]
+
+    def _get_key(self) -> str:
+        return f"{self.__class__.__name__}-{self.crc32_hex}-{self.need_word_time_stamp}"
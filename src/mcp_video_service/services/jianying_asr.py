@@ -3,7 +3,6 @@ import hashlib
 import hmac
 import json
 import logging
-import os
 import time
 import uuid
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
@@ -37,8 +36,9 @@ class JianYingASR(BaseASR):
         need_word_time_stamp: bool = False,
         start_time: float = 0,
         end_time: float = 6000,
+        cache_dir: Optional[str] = None,
     ):
-        super().__init__(audio_path, use_cache)
+        super().__init__(audio_path, use_cache, cache_dir=cache_dir)
         self.audio_path = audio_path
         self.end_time = end_time
         self.start_time = start_time
@@ -151,7 +151,10 @@ class JianYingASR(BaseASR):
             ]
 
     def _get_key(self):
-        return f"{self.__class__.__name__}-{self.crc32_hex}-{self.need_word_time_stamp}"
+        return (
+            f"{self.__class__.__name__}-{self.crc32_hex}-{self.need_word_time_stamp}"
+            f"-{self.start_time}-{self.end_time}"
+        )
 
     def _get_tid(self):
         i = str(datetime.datetime.now().year)[3]
@@ -229,11 +232,7 @@ class JianYingASR(BaseASR):
 
     def _upload_auth(self):
         """Get upload authorization"""
-        if isinstance(self.audio_path, bytes):
-            file_size = len(self.audio_path)
-        else:
-            file_size = os.path.getsize(self.audio_path)
-        request_parameters = f"Action=ApplyUploadInner&FileSize={file_size}&FileType=object&IsInner=1&SpaceName=lv-mac-recognition&Version=2020-11-19&s=5y0udbjapi"
+        request_parameters = f"Action=ApplyUploadInner&FileSize={self.file_size}&FileType=object&IsInner=1&SpaceName=lv-mac-recognition&Version=2020-11-19&s=5y0udbjapi"
 
         t = datetime.datetime.utcnow()
         amz_date = t.strftime("%Y%m%dT%H%M%SZ")
@@ -269,7 +268,9 @@ class JianYingASR(BaseASR):
         """Upload the file"""
         url = f"https://{self.upload_hosts}/{self.store_uri}?partNumber=1&uploadID={self.upload_id}"
         headers = self._uplosd_headers()
-        response = requests.put(url, data=self.file_binary, headers=headers)
+        # Stream the file from disk instead of holding it in memory
+        with self._open_audio() as f:
+            response = requests.put(url, data=f, headers=headers)
         resp_data = response.json()
         assert resp_data["success"] == 0, f"File upload failed: {response.text}"
         return resp_data
@@ -287,7 +288,8 @@ class JianYingASR(BaseASR):
         """Commit the uploaded file"""
         url = f"https://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}&partNumber=1&x-amz-security-token={self.session_token}"
         headers = self._uplosd_headers()
-        requests.put(url, data=self.file_binary, headers=headers)
+        with self._open_audio() as f:
+            requests.put(url, data=f, headers=headers)
         return self.store_uri
 
 
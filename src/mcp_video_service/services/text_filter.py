@@ -0,0 +1,104 @@
+import re
+from collections import deque
+from typing import Deque, Iterable, Iterator, Tuple
+
+try:
+    from .asr_data import ASRDataSeg
+except ImportError:
+    from asr_data import ASRDataSeg
+
+# Whisper 在静音、片尾处常见的"幻觉"文本（来自视频网站的字幕水印和片尾语）
+_BOILERPLATE_PATTERNS = [
+    # 英文
+    r"thanks? (?:you )?(?:so much )?for watching",
+    r"thanks? (?:you )?(?:so much )?for listening",
+    r"thank you for your attention",
+    r"(?:please )?(?:like,? )?(?:comment,? )?(?:and )?subscribe(?: to (?:my|our|the) channel)?",
+    r"don'?t forget to (?:like and )?subscribe",
+    r"subscribe to (?:my|our|the) channel",
+    r"see you in the next (?:video|one)",
+    r"see you next time",
+    r"subtitles by the amara\.org community",
+    # 只匹配署名为网站域名的字幕水印，避免误伤正常语句（如 "captions by the team are ..."）
+    r"(?:english )?(?:subtitles?|captions|transcription) (?:provided )?by [\w-]+(?:\.[\w-]+)*\.(?:org|com|net|tv)",
+    # 中文
+    r"字幕由\s*amara\.org\s*社区提供",
+    r"由\s*amara\.org\s*社区提供的字幕",
+    r"请不吝点赞\s*订阅\s*转发\s*打赏支持明镜与点点栏目",
+    r"明镜与点点栏目",
+    r"(?:谢谢|感谢)(?:大家|各位)?(?:的)?(?:观看|收看|收听)",
+    r"(?:请|记得|欢迎)?(?:点赞|订阅|转发|分享|打赏)(?:[、,，\s]*(?:点赞|订阅|转发|分享|打赏))+.{0,10}",
+    r"(?:欢迎|请)?订阅(?:我的|我们的|本)?频道",
+    r"字幕志愿者.{0,20}",
+    r"(?:本|中文)?字幕(?:由|by)\s*[\w-]+(?:\.[\w-]+)*\.(?:org|com|net|tv)\s*(?:社区)?提供",
+    r"优优独播剧场.{0,30}",
+    r"小编字幕.{0,20}",
+    # 日文 / 韩文
+    r"ご視聴ありがとうございました",
+    r"チャンネル登録.{0,20}",
+    r"시청해\s*주셔서\s*감사합니다",
+    r"구독과\s*좋아요.{0,20}",
+]
+
+# 整段锚定：只有整段文本都是模板化内容时才丢弃
+_BOILERPLATE_RE = re.compile(
+    "^(?:" + "|".join(f"(?:{p})" for p in _BOILERPLATE_PATTERNS) + ")$", re.IGNORECASE
+)
+
+# CJK 字符逐字切分，其他语言按单词切分
+_TOKEN_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|[^\W_]+"
+)
+
+# 去除首尾空白和标点，用于整段匹配模板化文本
+_EDGE_PUNCT_RE = re.compile(r"^[\W_]+|[\W_]+$")
+
+
+def is_boilerplate(text: str) -> bool:
+    """判断整段文本是否为模板化的片尾/水印文本"""
+    normalized = _EDGE_PUNCT_RE.sub("", text.strip())
+    if not normalized:
+        return False
+    return _BOILERPLATE_RE.match(normalized) is not None
+
+
+def _count_ngram(tokens: Tuple[str, ...], n: int) -> int:
+    """统计末尾 n-gram 在 tokens 中出现的次数"""
+    gram = tokens[-n:]
+    return sum(1 for i in range(len(tokens) - n + 1) if tokens[i : i + n] == gram)
+
+
+def filter_segments(
+    segments: Iterable[ASRDataSeg],
+    n: int = 5,
+    max_repeats: int = 3,
+    window: int = 200,
+) -> Iterator[ASRDataSeg]:
+    """
+    过滤本地 Whisper 输出中的循环重复和模板化文本
+
+    逐段处理，丢弃的是整段，保留下来的分段与原始时间戳保持对齐，
+    因此既可以用于完整结果，也可以用于流式输出。
+
+    Args:
+        segments: 原始分段
+        n: 检测重复使用的 n-gram 长度
+        max_repeats: 末尾 n-gram 在滑动窗口内允许出现的最大次数
+        window: 滑动窗口保留的最近词元数
+
+    Yields:
+        ASRDataSeg: 过滤后的分段
+    """
+    recent: Deque[str] = deque(maxlen=window)
+    for seg in segments:
+        if is_boilerplate(seg.text):
+            continue
+
+        tokens = _TOKEN_RE.findall(seg.text.lower())
+        if tokens:
+            candidate = tuple(recent) + tuple(tokens)
+            if len(candidate) >= n and _count_ngram(candidate, n) > max_repeats:
+                continue
+            recent.extend(tokens)
+
+        yield seg
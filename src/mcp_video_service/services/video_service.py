@@ -1,26 +1,110 @@
+import asyncio
+import functools
+import hashlib
 import os
 import tempfile
+import threading
 import yt_dlp
 import logging
 import uuid
-from typing import Optional, Literal
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Literal, Tuple
 import yaml
 
 try:
+    from .asr_cache import ASRCache, PCMCache, file_crc32, pcm_sha256
+    from .asr_data import ASRData, ASRDataSeg
     from .base_asr import BaseASR
     from .jianying_asr import JianYingASR
     from .bcut_asr import BcutASR
+    from .text_filter import filter_segments
+    from .whisper_backend import SAMPLE_RATE, WhisperBackend, create_whisper_backend, decode_audio, is_silent, trim_silence
 except ImportError:
+    from asr_cache import ASRCache, PCMCache, file_crc32, pcm_sha256
+    from asr_data import ASRData, ASRDataSeg
     from base_asr import BaseASR
     from jianying_asr import JianYingASR
     from bcut_asr import BcutASR
+    from text_filter import filter_segments
+    from whisper_backend import SAMPLE_RATE, WhisperBackend, create_whisper_backend, decode_audio, is_silent, trim_silence
 
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 配置日志：只为本服务的日志器添加处理器，不修改根日志器，避免把 urllib3、yt-dlp 等第三方库也切到 DEBUG
 logger = logging.getLogger('video_service')
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+# 作为包导入时，同时覆盖 services 下各模块（base_asr、asr_cache 等）的日志器
+for _name in ('video_service', __package__):
+    if _name:
+        _service_logger = logging.getLogger(_name)
+        _service_logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        _service_logger.addHandler(_log_handler)
+        _service_logger.propagate = False
+
+# 优先使用 libyaml 的 C 实现解析配置
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(config_path: str, mtime_ns: int) -> dict:
+    """解析 YAML 配置文件，按路径和修改时间缓存（返回值只读，不要修改）"""
+    with open(config_path, 'r', encoding='utf-8') as file:
+        return yaml.load(file, Loader=_YAML_LOADER) or {}
+
+
+def _load_config(config_path: str) -> dict:
+    """读取配置文件，文件未修改时复用上次的解析结果"""
+    return _parse_config(config_path, os.stat(config_path).st_mtime_ns)
+
+
+# 已加载的本地 Whisper 模型，多个 VideoService 实例共享，避免重复加载权重
+_MODEL_CACHE: Dict[Tuple, WhisperBackend] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _get_whisper_backend(whisper_config: dict) -> WhisperBackend:
+    """按后端、模型和推理参数获取本地 Whisper 推理后端，首次使用时加载（并按需预热）"""
+    key = (
+        whisper_config['backend'],
+        whisper_config['model'],
+        whisper_config['batch_size'],
+        whisper_config['vad'],
+        whisper_config['compute_type'],
+        whisper_config['device'],
+        whisper_config['vad_min_silence_ms'],
+        whisper_config['num_workers'],
+    )
+    # 加锁防止并发创建实例时重复加载同一模型
+    with _MODEL_CACHE_LOCK:
+        backend = _MODEL_CACHE.get(key)
+        if backend is None:
+            logger.info("初始化 Whisper 模型...")
+            backend = create_whisper_backend(
+                whisper_config['backend'],
+                whisper_config['model'],
+                batch_size=whisper_config['batch_size'],
+                vad=whisper_config['vad'],
+                compute_type=whisper_config['compute_type'],
+                device=whisper_config['device'],
+                min_silence_ms=whisper_config['vad_min_silence_ms'],
+                num_workers=whisper_config['num_workers'],
+            )
+            # 启动时预热，避免首个请求承担 CUDA 初始化、VAD 模型加载等一次性开销
+            if os.getenv('WHISPER_WARMUP', '1') == '1':
+                backend.warmup()
+            _MODEL_CACHE[key] = backend
+        return backend
+
+
+def _flatten_config(config: dict, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+    """把嵌套配置展开为 (点分键, 值)"""
+    for key, value in config.items():
+        if isinstance(value, dict):
+            yield from _flatten_config(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
 
 class VideoLogger:
     """自定义的 yt-dlp 日志处理器"""
@@ -50,83 +134,94 @@ def download_hook(d):
         logger.info('下载完成，开始后处理...')
 
 class VideoService:
-    """视频服务，负责下载视频的音频部分并进行文字转换处理"""    
-      
-    def _generate_unique_filename(self, ext: str) -> str:
-        """生成唯一的文件名
-        
-        Args:
-            ext: 文件扩展名（不包含点号）
-            
-        Returns:
-            str: 生成的唯一文件名（格式：uuid.扩展名）
-        """
-        return f"{uuid.uuid4()}.{ext}"
-    
-          
-   
-        
+    """视频服务，负责下载视频的音频部分并进行文字转换处理"""
+
     def __init__(self, config_path: str='config.yaml'):
         # 尝试从YAML文件加载配置，如果失败则使用默认值
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                file_config = yaml.safe_load(file) or {}
+            file_config = _load_config(config_path)
         except (FileNotFoundError, yaml.YAMLError):
             file_config = {}
             logger.info(f"配置文件 {config_path} 不存在或解析失败，使用默认配置")
             
-        # 获取配置值的辅助函数
-        def get_config_value(keys, default):
-            """从嵌套字典中安全获取值"""
-            value = file_config
-            for key in keys:
-                if isinstance(value, dict) and key in value:
-                    value = value[key]
-                else:
-                    return default
-            return value
-        
-            
-        # 从环境变量读取配置，如果没有则从文件配置读取，最后使用默认值        
+        # 把嵌套配置展开为点分键（如 asr.provider），读取时只需一次字典查找
+        flat_config = dict(_flatten_config(file_config))
+
+        def env_or(name, key, default):
+            """环境变量已设置（非空）时使用环境变量，否则使用文件配置，最后使用默认值"""
+            value = os.environ.get(name)
+            return value if value else flat_config.get(key, default)
+
+        def env_or_bool(name, key, default):
+            value = env_or(name, key, default)
+            return value.lower() == 'true' if isinstance(value, str) else bool(value)
+
+        def env_or_optional_int(name, key):
+            value = env_or(name, key, None)
+            return int(value) if value is not None else None
+
+        # 从环境变量读取配置，如果没有则从文件配置读取，最后使用默认值
         self.config = {
             'asr': {
-                'provider': os.getenv('ASR_PROVIDER') or get_config_value(['asr', 'provider'], 'whisper'),
-                'use_cache': os.getenv('ASR_USE_CACHE', 'false').lower() == 'true' or get_config_value(['asr', 'use_cache'], False),
-                'need_word_time_stamp': os.getenv('ASR_WORD_TIME_STAMP', 'false').lower() == 'true' or get_config_value(['asr', 'need_word_time_stamp'], False),
+                'provider': env_or('ASR_PROVIDER', 'asr.provider', 'whisper'),
+                'use_cache': env_or_bool('ASR_USE_CACHE', 'asr.use_cache', False),
+                'need_word_time_stamp': env_or_bool('ASR_WORD_TIME_STAMP', 'asr.need_word_time_stamp', False),
             },
             'whisper': {
-                'model': os.getenv('WHISPER_MODEL') or get_config_value(['whisper', 'model'], 'base'),
-                'language': os.getenv('WHISPER_LANGUAGE') or get_config_value(['whisper', 'language'], 'auto')
+                'backend': env_or('WHISPER_BACKEND', 'whisper.backend', 'faster-whisper'),
+                'model': env_or('WHISPER_MODEL', 'whisper.model', 'base'),
+                'language': env_or('WHISPER_LANGUAGE', 'whisper.language', 'auto'),
+                'batch_size': int(env_or('WHISPER_BATCH_SIZE', 'whisper.batch_size', 16)),
+                'vad': env_or_bool('WHISPER_VAD', 'whisper.vad', True),
+                # 未设置时使用 faster-whisper 的默认值
+                'vad_min_silence_ms': env_or_optional_int('WHISPER_VAD_MIN_SILENCE_MS', 'whisper.vad_min_silence_ms'),
+                'pcm_cache': env_or_bool('WHISPER_PCM_CACHE', 'whisper.pcm_cache', False),
+                'compute_type': env_or('WHISPER_COMPUTE_TYPE', 'whisper.compute_type', 'auto'),
+                'device': env_or('WHISPER_DEVICE', 'whisper.device', 'auto'),
+                'num_workers': int(env_or('WHISPER_NUM_WORKERS', 'whisper.num_workers', 1)),
             },
             'jianying': {
-                'start_time': float(os.getenv('JIANYING_START_TIME', '0') or get_config_value(['jianying', 'start_time'], 0)),
-                'end_time': float(os.getenv('JIANYING_END_TIME', '6000') or get_config_value(['jianying', 'end_time'], 6000)),
+                'start_time': float(env_or('JIANYING_START_TIME', 'jianying.start_time', 0)),
+                'end_time': float(env_or('JIANYING_END_TIME', 'jianying.end_time', 6000)),
             },
             'youtube': {
                 'download': {
-                    # 'format': os.getenv('YOUTUBE_FORMAT') or get_config_value(['youtube', 'download', 'format'], 'bestaudio'),
-                    'audio_format': os.getenv('AUDIO_FORMAT') or get_config_value(['youtube', 'download', 'audio_format'], 'mp3'),
-                    'audio_quality': os.getenv('AUDIO_QUALITY') or get_config_value(['youtube', 'download', 'audio_quality'], '192')
+                    # 'format': env_or('YOUTUBE_FORMAT', 'youtube.download.format', 'bestaudio'),
+                    'audio_format': env_or('AUDIO_FORMAT', 'youtube.download.audio_format', 'mp3'),
+                    'audio_quality': env_or('AUDIO_QUALITY', 'youtube.download.audio_quality', '192')
                 }
             },
             'storage': {
-                'temp_dir': os.getenv('TEMP_DIR') or get_config_value(['storage', 'temp_dir'], '/tmp/mcp-video')
+                'temp_dir': env_or('TEMP_DIR', 'storage.temp_dir', '/tmp/mcp-video')
             }
         }
         
         # 初始化 ASR 提供者
         self.asr_provider = self.config['asr']['provider'].lower()
+
+        # ASR 结果缓存目录，相同音频再次识别时直接返回缓存结果
+        self.asr_cache_dir = os.path.join(self.config['storage']['temp_dir'], 'asr_cache')
+        self.asr_cache = ASRCache(self.asr_cache_dir) if self.config['asr']['use_cache'] else None
+
+        # 解码后的 PCM 缓存目录，重复识别同一文件时跳过解码
+        self.pcm_cache_dir = os.path.join(self.config['storage']['temp_dir'], 'pcm_cache')
+        self.pcm_cache = PCMCache(self.pcm_cache_dir) if self.config['whisper']['pcm_cache'] else None
         
-        # 如果使用 Whisper，则加载模型
+        # 如果使用 Whisper，则获取（首次使用时加载）本地推理后端
         if self.asr_provider == 'whisper':
-            import whisper
-            logger.info("初始化 Whisper 模型...")
-            self.whisper_model = whisper.load_model(self.config['whisper']['model'])
+            self.whisper_backend = _get_whisper_backend(self.config['whisper'])
+            # 本地推理使用专用线程：CTranslate2 推理时释放 GIL，不会阻塞事件循环，
+            # 线程数与后端可同时推理的数量一致（whisper.cpp 固定为 1），默认串行执行，
+            # 避免多个请求同时占用全部 CPU 核心或显存
+            self._whisper_pool = ThreadPoolExecutor(
+                max_workers=self.whisper_backend.num_workers, thread_name_prefix='whisper'
+            )
         else:
-            self.whisper_model = None
+            self.whisper_backend = None
+            self._whisper_pool = None
         
         # 通用下载选项
-        self.common_opts = {
+        self.common_opts = MappingProxyType({
             'logger': VideoLogger(),  # 使用自定义日志处理器
             'progress_hooks': [download_hook],  # 使用下载进度回调
             'retries': int(os.getenv('DOWNLOAD_RETRIES', '3')),  # 重试次数
@@ -135,107 +230,123 @@ class VideoService:
             'nocheckcertificate': True,  # 忽略 SSL 证书验证
             'ignoreerrors': True,  # 忽略可恢复的错误
             'no_warnings': True,  # 减少输出
-        }
+            'concurrent_fragment_downloads': int(os.getenv('CONCURRENT_FRAGMENTS', '10')),  # HLS/DASH 分片并行下载数
+            'http_chunk_size': 10 * 1024 * 1024,  # 按 10MB 分块请求，避免单个长连接被限速
+        })
+
+        # 下载并发控制：专用线程池执行 yt-dlp，信号量限制同时进行的下载数
+        self.download_concurrency = int(os.getenv('DL_CONCURRENCY', '4'))
+        self._download_pool = ThreadPoolExecutor(max_workers=self.download_concurrency, thread_name_prefix='video-dl')
+        # 在线 ASR、临时文件清理等其他阻塞操作使用单独的线程池，不与下载争抢线程，大小可通过 THREAD_POOL_SIZE 调整；
+        # 本地 Whisper 推理使用 _whisper_pool（大小由 whisper.num_workers 决定），不占用该线程池
+        self._worker_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv('THREAD_POOL_SIZE', '16')), thread_name_prefix='video-worker'
+        )
+        self._download_semaphore = asyncio.Semaphore(self.download_concurrency)
+        # YoutubeDL 实例按线程复用（实例本身不是线程安全的），省去每次下载重新初始化提取器和 HTTP 会话
+        self._ydl_local = threading.local()
+        self._ydl_instances: List[yt_dlp.YoutubeDL] = []
+        self._ydl_lock = threading.Lock()
         
+        # 下载配置在初始化后只读，文件名由每次下载传入的 mcp_uid 决定
         # 音频下载配置
-        self.audio_opts = {
+        # 优先选择已是目标格式的音频流，FFmpegExtractAudio 遇到相同编码时只复制不重新编码；
+        # audio_format 为 best 时保留原始编码，只提取音轨
+        audio_format = self.config['youtube']['download']['audio_format']
+        audio_format_selector = 'bestaudio[ext=m4a]/bestaudio/best'
+        if audio_format not in ('best', 'm4a'):
+            audio_format_selector = f'bestaudio[ext={audio_format}]/{audio_format_selector}'
+        self.audio_opts = MappingProxyType({
             **self.common_opts,
-            'format': 'bestaudio',  # 优先最佳音频，如果没有则选择最佳视频
+            'outtmpl': os.path.join(self.config['storage']['temp_dir'], '%(mcp_uid)s.%(ext)s'),
+            'format': audio_format_selector,  # 优先目标格式和 m4a 音频流，其次任意最佳音频，如果没有则选择最佳视频
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': self.config['youtube']['download']['audio_format'],
+                'preferredcodec': audio_format,
                 'preferredquality': self.config['youtube']['download']['audio_quality'],
             }],
-            'outtmpl': os.path.join(self.config['storage']['temp_dir'], '%(id)s.%(ext)s'),  # 直接下载到目标目录
-        }
+        })
+
+        # 本地 Whisper 直接解码原始音频流，不需要先转码为 MP3
+        self.source_audio_opts = MappingProxyType({
+            **self.common_opts,
+            'outtmpl': os.path.join(self.config['storage']['temp_dir'], '%(mcp_uid)s.%(ext)s'),
+            'format': 'bestaudio/best',
+        })
         
         # 视频下载配置
-        self.video_opts = {
+        self.video_opts = MappingProxyType({
             **self.common_opts,
+            'outtmpl': os.path.join(self.config['storage']['temp_dir'], '%(mcp_uid)s.%(ext)s'),
             'format': 'bestvideo+bestaudio/best',  # 优先选择最佳视频+音频，如果没有则选择最佳
-            'outtmpl': os.path.join(self.config['storage']['temp_dir'], '%(id)s.%(ext)s'),  # 直接下载到目标目录
-        }
+        })
 
         # 确保临时目录存在
         os.makedirs(self.config['storage']['temp_dir'], exist_ok=True)
 
-    async def download(self, url: str, opts: dict) -> Optional[str]:
-        import asyncio
-        
+    def _get_ydl(self, opts: Mapping[str, Any]) -> yt_dlp.YoutubeDL:
+        """获取当前线程对应下载配置的 YoutubeDL 实例，首次使用时创建（opts 应为实例上的只读配置）"""
+        instances = getattr(self._ydl_local, 'instances', None)
+        if instances is None:
+            instances = self._ydl_local.instances = {}
+        entry = instances.get(id(opts))
+        if entry is None:
+            ydl = yt_dlp.YoutubeDL(dict(opts))
+            # 同时保存 opts 的引用，保证 id 不会被复用
+            entry = instances[id(opts)] = (opts, ydl)
+            with self._ydl_lock:
+                self._ydl_instances.append(ydl)
+        return entry[1]
+
+    def close(self):
+        """关闭复用的 YoutubeDL 实例和线程池"""
+        with self._ydl_lock:
+            instances, self._ydl_instances = self._ydl_instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.error(f"关闭 YoutubeDL 失败: {str(e)}")
+        self._download_pool.shutdown(wait=False)
+        self._worker_pool.shutdown(wait=False)
+        if self._whisper_pool is not None:
+            self._whisper_pool.shutdown(wait=False)
+
+    async def download(self, url: str, opts: Mapping[str, Any]) -> Optional[str]:
         def _download_sync():
             """同步下载函数，在线程池中执行"""
             try:
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    logger.info(f"开始下载: {url}")
-                    # 获取视频信息
-                    info = ydl.extract_info(url, download=True)
-                    
-                    if info is None:
-                        raise Exception("无法获取视频信息，可能是格式不支持或网络问题")
-                    
-                    # 获取下载后的文件路径
-                    temp_path = ydl.prepare_filename(info)                
-                    logger.debug(f"temp_path: {temp_path}")
-                    
-                    # 检查是否为音频下载（有后处理器）
-                    if 'postprocessors' in opts and any(pp.get('key') == 'FFmpegExtractAudio' for pp in opts['postprocessors']):
-                        # 音频下载：后处理后的文件路径
-                        audio_ext = opts['postprocessors'][0]['preferredcodec']
-                        final_path = os.path.splitext(temp_path)[0] + '.' + audio_ext
-                        logger.debug(f"期望的音频文件路径: {final_path}")
-                        
-                        # 检查多种可能的文件路径
-                        possible_paths = [
-                            final_path,  # 标准路径
-                            temp_path,   # 原始下载路径（如果后处理失败）
-                        ]
-                        
-                        actual_file = None
-                        for path in possible_paths:
-                            logger.debug(f"检查文件: {path}")
-                            if os.path.exists(path):
-                                actual_file = path
-                                break
-                        
-                        if actual_file:
-                            # 使用唯一文件名重命名
-                            new_filename = self._generate_unique_filename(audio_ext)
-                            new_path = os.path.join(self.config['storage']['temp_dir'], new_filename)
-                            os.rename(actual_file, new_path)
-                            logger.info(f"音频下载完成: {new_path}")
-                            return new_path
-                        else:
-                            # 列出目录中的所有文件进行调试
-                            dir_path = os.path.dirname(temp_path) if os.path.dirname(temp_path) else '.'
-                            files = os.listdir(dir_path)
-                            logger.error(f"音频文件不存在。目录 {dir_path} 中的文件: {files}")
-                            return None
-                    else:
-                        # 视频下载：直接使用下载的文件
-                        file_ext = os.path.splitext(temp_path)[1][1:]  # 获取扩展名（不含点号）                
-                        new_filename = self._generate_unique_filename(file_ext)                
-                        new_path = os.path.join(self.config['storage']['temp_dir'], new_filename)
-                        logger.debug(f"new_path: {new_path}")
-                        
-                        # 重命名文件
-                        if os.path.exists(temp_path):
-                            os.rename(temp_path, new_path)
-                            logger.info(f"视频下载完成: {new_path}")
-                            return new_path
-                        else:
-                            logger.error(f"视频文件不存在: {temp_path}")
-                            return None
+                ydl = self._get_ydl(opts)
+                logger.info(f"开始下载: {url}")
+                # 获取视频信息，yt-dlp 直接写入以唯一 ID 命名的文件，省去下载后的重命名
+                info = ydl.extract_info(url, download=True, extra_info={'mcp_uid': uuid.uuid4().hex})
+
+                if info is None:
+                    raise Exception("无法获取视频信息，可能是格式不支持或网络问题")
+                
+                # yt-dlp 在 requested_downloads 中记录最终文件路径（已包含后处理改写的扩展名）
+                requested_downloads = info.get('requested_downloads') or []
+                file_path = requested_downloads[-1].get('filepath') if requested_downloads else None
+                logger.debug("file_path: %s", file_path)
+                # ignoreerrors 开启时下载或后处理失败不会抛出异常，文件可能不存在
+                if not file_path or not os.path.exists(file_path):
+                    logger.error(f"下载的文件不存在: {file_path}")
+                    return None
+
+                logger.info(f"下载完成: {file_path}")
+                return file_path
             except Exception as e:
                 logger.error(f"下载失败: {str(e)}")
                 raise Exception(f"下载视频失败: {str(e)}")
         
         try:
-            # 在线程池中执行下载，避免阻塞事件循环，设置超时
+            # 在专用线程池中执行下载，避免阻塞事件循环，设置超时
             loop = asyncio.get_event_loop()
-            result = await asyncio.wait_for(
-                loop.run_in_executor(None, _download_sync),
-                timeout=300  # 5分钟超时
-            )
+            async with self._download_semaphore:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self._download_pool, _download_sync),
+                    timeout=300  # 5分钟超时
+                )
             return result
         except asyncio.TimeoutError:
             raise Exception("下载超时（5分钟），请尝试较短的视频或检查网络连接")
@@ -288,12 +399,18 @@ class VideoService:
             url: 视频平台的URL
             
         Returns:
-            str: 下载的音频文件路径(MP3格式)
+            str: 下载的音频文件路径(格式由 audio_format 配置决定，默认 MP3)
             
         Raises:
             Exception: 当下载失败时抛出异常
         """
         return await self.download(url, self.audio_opts)
+
+    async def _download_for_asr(self, url: str) -> Optional[str]:
+        """下载用于识别的音频：本地 Whisper 使用原始音频流（PyAV 直接解码，省去 MP3 编码和再解码），在线 ASR 使用 MP3"""
+        if self.asr_provider == 'whisper':
+            return await self.download(url, self.source_audio_opts)
+        return await self.download_audio(url)
     
     def _create_asr_instance(self, audio_path: str) -> BaseASR:
         """创建 ASR 实例
@@ -317,22 +434,131 @@ class VideoService:
                 need_word_time_stamp=self.config['asr']['need_word_time_stamp'],
                 start_time=self.config['jianying']['start_time'],
                 end_time=self.config['jianying']['end_time'],
+                cache_dir=self.asr_cache_dir,
             )
         elif self.asr_provider == 'bcut':
             return BcutASR(
                 audio_path,
                 use_cache=self.config['asr']['use_cache'],
                 need_word_time_stamp=self.config['asr']['need_word_time_stamp'],
+                cache_dir=self.asr_cache_dir,
             )
         else:
             raise ValueError(f"不支持的 ASR 提供者: {self.asr_provider}")
                    
-    async def extract_text(self, audio_path: str) -> str:
+    def _load_pcm(self, audio_path: str) -> np.ndarray:
+        """解码音频为 16kHz 单声道 float32 PCM，开启 PCM 缓存时复用之前的解码结果
+        
+        Args:
+            audio_path: 音频文件路径
+            
+        Returns:
+            np.ndarray: PCM 数据
+        """
+        if self.pcm_cache is None:
+            return decode_audio(audio_path)
+
+        cache_key = f"{file_crc32(audio_path)}-{os.path.getsize(audio_path)}"
+        audio = self.pcm_cache.get(cache_key)
+        if audio is not None:
+            logger.debug("命中 PCM 缓存: %s", cache_key)
+            return audio
+
+        audio = decode_audio(audio_path)
+        self.pcm_cache.set(cache_key, audio)
+        return audio
+
+    def _iter_whisper_segments(self, audio_path: str) -> Iterator[ASRDataSeg]:
+        """使用本地 Whisper 模型逐段识别音频，开启缓存时按识别配置和解码后的 PCM 复用结果
+        
+        Args:
+            audio_path: 音频文件路径
+            
+        Yields:
+            ASRDataSeg: 过滤后的识别分段
+        """
+        language = None if self.config['whisper']['language'] == 'auto' else self.config['whisper']['language']
+        audio = self._load_pcm(audio_path)
+        # 过短或整体静音的音频直接返回空结果，不调用模型
+        if is_silent(audio):
+            logger.info(f"音频过短或为静音，跳过识别: {audio_path}")
+            return
+
+        cache_key = None
+        if self.asr_cache is not None:
+            # 按解码后的 PCM 计算缓存键，同一音源重新编码后仍能命中
+            cache_key = f"whisper-{self._asr_settings_digest()}-{pcm_sha256(audio)}"
+            cached = self.asr_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"命中 ASR 缓存: {cache_key}")
+                yield from cached.segments
+                return
+
+        # 裁掉首尾静音后识别，分段时间加回裁掉的时长
+        audio, offset = trim_silence(audio)
+        offset_ms = offset * 1000 / SAMPLE_RATE
+        asr_segments = []
+        # 过滤重复和模板化文本
+        for segment in filter_segments(self.whisper_backend.transcribe(audio, language)):
+            if offset_ms:
+                segment = ASRDataSeg(segment.text, segment.start_time + offset_ms, segment.end_time + offset_ms)
+            asr_segments.append(segment)
+            yield segment
+
+        # 只有完整识别的结果才写入缓存
+        if cache_key is not None:
+            asr_data = ASRData(text="".join(seg.text for seg in asr_segments), segments=asr_segments)
+            self.asr_cache.set(cache_key, asr_data)
+
+    async def stream_segments(self, audio_path: str) -> AsyncIterator[ASRDataSeg]:
+        """
+        逐段识别音频，Whisper 每解码出一段就立即返回，无需等待整个文件处理完成
+        
+        Args:
+            audio_path: 音频文件路径
+            
+        Yields:
+            ASRDataSeg: 识别分段（时间单位为毫秒）
+            
+        Raises:
+            Exception: 当文件不存在或处理失败时
+        """
+        if not os.path.exists(audio_path):
+            raise Exception(f"音频文件不存在: {audio_path}")
+
+        loop = asyncio.get_running_loop()
+        if self.asr_provider == 'whisper':
+            # 使用 Whisper 本地模型，在专用推理线程中逐段推进解码，避免阻塞事件循环
+            logger.info(f"使用 Whisper 模型进行语音识别: {audio_path}")
+            segments = self._iter_whisper_segments(audio_path)
+            while True:
+                segment = await loop.run_in_executor(self._whisper_pool, next, segments, None)
+                if segment is None:
+                    break
+                yield segment
+        else:
+            # 使用在线 ASR 服务，接口一次性返回全部结果
+            logger.info(f"使用 {self.asr_provider} 进行语音识别: {audio_path}")
+
+            def _run_asr_sync():
+                """同步执行上传、轮询和限流等待，在线程池中执行"""
+                return self._create_asr_instance(audio_path).run()
+
+            asr_data = await loop.run_in_executor(self._worker_pool, _run_asr_sync)
+            for segment in asr_data.segments:
+                yield segment
+
+    async def extract_text(
+        self,
+        audio_path: str,
+        on_segment: Optional[Callable[[ASRDataSeg], Awaitable[None]]] = None,
+    ) -> str:
         """
         从音频文件中提取文字
         
         Args:
             audio_path: 音频文件路径
+            on_segment: 每识别出一段时调用的异步回调，可用于向客户端推送进度和部分结果
             
         Returns:
             str: 提取的文字内容
@@ -341,35 +567,91 @@ class VideoService:
             Exception: 当文件不存在或处理失败时
         """
         try:
-            if not os.path.exists(audio_path):
-                raise Exception(f"音频文件不存在: {audio_path}")
-
-            if self.asr_provider == 'whisper':
-                # 使用 Whisper 本地模型
-                logger.info(f"使用 Whisper 模型进行语音识别: {audio_path}")
-                result = self.whisper_model.transcribe(
-                    audio_path,
-                    language=None if self.config['whisper']['language'] == 'auto' else self.config['whisper']['language']
-                )
-                return result["text"]
-            else:
-                # 使用在线 ASR 服务
-                logger.info(f"使用 {self.asr_provider} 进行语音识别: {audio_path}")
-                asr_instance = self._create_asr_instance(audio_path)
-                asr_data = asr_instance.run()
-                return asr_data.text
+            texts = []
+            async for segment in self.stream_segments(audio_path):
+                texts.append(segment.text)
+                if on_segment is not None:
+                    await on_segment(segment)
+            # Whisper 分段自带前导空格，在线 ASR 分段按行拼接
+            separator = "" if self.asr_provider == 'whisper' else "\n"
+            return separator.join(texts)
 
         except Exception as e:
             raise Exception(f"文字提取失败: {str(e)}")
 
+    async def batch_extract_text(self, audio_paths: List[str]) -> List[str]:
+        """
+        并发提取多个音频文件的文字（各文件分别识别，不做跨文件的批量编码），
+        本地 Whisper 的并发度受推理线程池大小（num_workers）限制
+        
+        Args:
+            audio_paths: 音频文件路径列表
+            
+        Returns:
+            List[str]: 与 audio_paths 顺序一致的文字内容
+            
+        Raises:
+            Exception: 当任一文件处理失败时
+        """
+        return list(await asyncio.gather(*(self.extract_text(path) for path in audio_paths)))
+
     async def cleanup(self, audio_path: str):
         """清理临时音频文件"""
+        def _remove():
+            # 直接删除，不存在时忽略，避免先检查再删除的竞态
+            try:
+                os.unlink(audio_path)
+            except FileNotFoundError:
+                pass
+
         try:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._worker_pool, _remove)
         except Exception as e:
             logger.error(f"清理音频文件失败: {str(e)}")
 
+    def _asr_settings_digest(self) -> str:
+        """对影响识别结果的配置取摘要，配置变化后不会命中旧的缓存"""
+        if self.asr_provider == 'whisper':
+            whisper_config = self.config['whisper']
+            settings = (
+                self.whisper_backend.name,
+                whisper_config['model'],
+                whisper_config['language'],
+                whisper_config['vad'],
+                whisper_config['vad_min_silence_ms'],
+                whisper_config['batch_size'],
+                whisper_config['compute_type'],
+                whisper_config['device'],
+            )
+        else:
+            settings = (
+                self.asr_provider,
+                self.config['asr']['need_word_time_stamp'],
+                self.config['jianying']['start_time'],
+                self.config['jianying']['end_time'],
+            )
+        return hashlib.sha256(repr(settings).encode('utf-8')).hexdigest()[:16]
+
+    def _url_cache_key(self, url: str) -> str:
+        """按识别配置和视频 URL 生成文字结果的缓存键"""
+        url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return f"url-{self.asr_provider}-{self._asr_settings_digest()}-{url_hash}"
+
+    def _get_cached_text(self, url: str) -> Optional[str]:
+        """读取同一 URL 之前的识别结果，命中时无需重新下载"""
+        if self.asr_cache is None:
+            return None
+        cached = self.asr_cache.get(self._url_cache_key(url))
+        if cached is None:
+            return None
+        logger.info(f"命中 URL 缓存: {url}")
+        return cached.text
+
+    def _set_cached_text(self, url: str, text: str):
+        if self.asr_cache is not None:
+            self.asr_cache.set(self._url_cache_key(url), ASRData(text=text, segments=[]))
+
     async def process_video(self, url: str) -> str:
         """
         处理视频：下载音频并提取文字
@@ -384,19 +666,107 @@ class VideoService:
             Exception: 当处理失败时
         """
         try:
+            # 开启缓存时，同一 URL 直接返回之前的结果
+            text = self._get_cached_text(url)
+            if text is not None:
+                return text
+
             # 下载音频
-            audio_path = await self.download_audio(url)
+            audio_path = await self._download_for_asr(url)
             if not audio_path:
                 raise Exception("音频下载失败")
             
-            logger.debug(f"音频文件路径: {audio_path}")
+            logger.debug("音频文件路径: %s", audio_path)
 
             try:
                 # 提取文字
-                return await self.extract_text(audio_path)
+                text = await self.extract_text(audio_path)
+                self._set_cached_text(url, text)
+                return text
             finally:
                 # 清理临时文件
                 await self.cleanup(audio_path)
 
         except Exception as e:
             raise Exception(f"视频处理失败: {str(e)}")
+
+    async def process_videos(self, urls: List[str]) -> List[str]:
+        """
+        批量处理视频：下载与识别流水线并行，下一个视频下载的同时识别已下载完成的音频
+        
+        Args:
+            urls: 视频 URL 列表
+            
+        Returns:
+            List[str]: 与 urls 顺序一致的文字内容
+            
+        Raises:
+            Exception: 当任一视频处理失败时（其余视频仍会处理完并清理临时文件）
+        """
+        # 本地模型按推理线程池大小并行识别；在线 ASR 可与下载并发数相同
+        worker_count = self.whisper_backend.num_workers if self.asr_provider == 'whisper' else self.download_concurrency
+        # 有界队列：识别跟不上时，已下载的音频最多排队 worker_count 个
+        queue: asyncio.Queue = asyncio.Queue(maxsize=worker_count)
+        # 同时存在的临时音频（下载中、排队中、识别中）不超过该数量，下载不会无限领先于识别
+        slots = asyncio.Semaphore(self.download_concurrency + 2 * worker_count)
+        results: List[str] = [''] * len(urls)
+        errors: Dict[int, Exception] = {}
+
+        async def _download(index: int, url: str):
+            text = self._get_cached_text(url)
+            if text is not None:
+                results[index] = text
+                return
+            await slots.acquire()
+            audio_path = None
+            try:
+                # 同时进行的下载数由 download() 内部的信号量限制
+                audio_path = await self._download_for_asr(url)
+                if not audio_path:
+                    raise Exception("音频下载失败")
+                await queue.put((index, audio_path))
+            except BaseException as e:
+                # 下载失败或在入队前被取消时，由这里清理文件并归还名额
+                if audio_path:
+                    await self.cleanup(audio_path)
+                slots.release()
+                if not isinstance(e, Exception):
+                    raise
+                errors[index] = e
+
+        async def _transcribe():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, audio_path = item
+                try:
+                    results[index] = await self.extract_text(audio_path)
+                    self._set_cached_text(urls[index], results[index])
+                except Exception as e:
+                    errors[index] = e
+                finally:
+                    await self.cleanup(audio_path)
+                    slots.release()
+
+        workers = [asyncio.create_task(_transcribe()) for _ in range(worker_count)]
+        downloads = [asyncio.create_task(_download(i, url)) for i, url in enumerate(urls)]
+        try:
+            await asyncio.gather(*downloads)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            # 调用方取消或出现异常时停止所有任务，并清理已下载但尚未识别的文件
+            for task in (*downloads, *workers):
+                task.cancel()
+            await asyncio.gather(*downloads, *workers, return_exceptions=True)
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    await self.cleanup(item[1])
+
+        if errors:
+            index = min(errors)
+            raise Exception(f"视频处理失败 ({urls[index]}): {str(errors[index])}")
+        return results
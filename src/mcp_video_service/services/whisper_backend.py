@@ -0,0 +1,296 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .asr_data import ASRDataSeg
+except ImportError:
+    from asr_data import ASRDataSeg
+
+logger = logging.getLogger(__name__)
+
+# 本地 Whisper 推理输入的采样率
+SAMPLE_RATE = 16000
+
+# 整段 RMS 低于该值视为静音
+SILENCE_RMS = 1e-3
+# 短于该时长（秒）的音频不做识别
+MIN_DURATION = 0.25
+# 裁剪首尾静音时使用的帧长（20 毫秒）
+_TRIM_FRAME = SAMPLE_RATE // 50
+
+
+def decode_audio(audio_path: str) -> np.ndarray:
+    """把音频解码为 16kHz 单声道 float32 PCM（使用 PyAV 在进程内解码，无需启动 ffmpeg 子进程）"""
+    from faster_whisper import decode_audio as _decode_audio
+
+    return _decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+
+def is_silent(audio: np.ndarray) -> bool:
+    """判断音频是否过短或整体静音，这类音频无需调用模型"""
+    if len(audio) < MIN_DURATION * SAMPLE_RATE:
+        return True
+    rms = np.sqrt(np.mean(np.square(audio, dtype=np.float32)))
+    return rms < SILENCE_RMS
+
+
+def trim_silence(audio: np.ndarray, top_db: float = 60) -> Tuple[np.ndarray, int]:
+    """
+    裁剪首尾静音
+
+    按 20 毫秒分帧计算能量，低于最大帧能量 top_db 分贝的帧视为静音。
+
+    Args:
+        audio: 16kHz 单声道 float32 PCM
+        top_db: 相对最大帧能量的静音阈值（分贝）
+
+    Returns:
+        Tuple[np.ndarray, int]: 裁剪后的 PCM 和裁掉的开头采样数
+    """
+    n_frames = len(audio) // _TRIM_FRAME
+    if n_frames == 0:
+        return audio, 0
+    frames = audio[: n_frames * _TRIM_FRAME].reshape(n_frames, _TRIM_FRAME)
+    power = np.mean(np.square(frames, dtype=np.float32), axis=1)
+    voiced = np.flatnonzero(power > power.max() * 10 ** (-top_db / 10))
+    if len(voiced) == 0:
+        return audio, 0
+    # 首尾各保留一帧，避免切掉弱起的音节
+    start = max(voiced[0] - 1, 0) * _TRIM_FRAME
+    end = min((voiced[-1] + 2) * _TRIM_FRAME, len(audio))
+    if voiced[-1] == n_frames - 1:
+        end = len(audio)
+    return audio[start:end], start
+
+
+class WhisperBackend(ABC):
+    """本地 Whisper 推理后端的基类"""
+
+    name = ""
+    # 可同时执行推理的线程数，调用方据此确定推理线程池大小
+    num_workers = 1
+
+    @abstractmethod
+    def transcribe(
+        self, audio: Union[str, np.ndarray], language: Optional[str] = None
+    ) -> Iterator[ASRDataSeg]:
+        """
+        识别音频
+
+        Args:
+            audio: 音频文件路径，或 16kHz 单声道 float32 PCM
+            language: 语言代码，None 表示自动检测
+
+        Yields:
+            ASRDataSeg: 识别出的分段，时间单位为毫秒
+        """
+        pass
+
+    def warmup(self) -> None:
+        """用 1 秒静音跑一次推理，把一次性初始化开销放到启动阶段"""
+        logger.info(f"预热 Whisper 模型 ({self.name})...")
+        try:
+            list(self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language="en"))
+        except Exception as e:
+            logger.warning(f"Whisper 预热失败: {str(e)}")
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """基于 faster-whisper (CTranslate2) 的推理后端"""
+
+    name = "faster-whisper"
+
+    def __init__(
+        self,
+        model: str,
+        batch_size: int = 16,
+        vad: bool = True,
+        compute_type: str = "auto",
+        device: str = "auto",
+        min_silence_ms: Optional[int] = None,
+        num_workers: int = 1,
+    ):
+        """
+        加载模型
+
+        Args:
+            model: 模型名称或本地路径
+            batch_size: 批量推理的批大小，<= 1 时逐段解码
+            vad: 是否使用 Silero VAD 跳过静音
+            compute_type: CTranslate2 计算类型（如 int8、int8_float16、float16），
+                auto 时 GPU 使用 int8_float16、CPU 使用 int8
+            device: 推理设备，可选 auto、cuda、cpu，auto 时有 CUDA 设备则使用 GPU
+            min_silence_ms: VAD 判定语音段结束所需的最短静音时长（毫秒），None 时使用
+                faster-whisper 的默认值（批量推理 160，逐段解码 2000）
+            num_workers: 可同时执行推理的线程数，多个文件可以在 GPU 上并行识别
+        """
+        import ctranslate2
+        from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+        if num_workers < 1:
+            raise ValueError(f"num_workers 必须大于等于 1: {num_workers}")
+
+        self.batch_size = batch_size
+        self.vad = vad
+        self.min_silence_ms = min_silence_ms
+        self.num_workers = num_workers
+
+        if device == "auto":
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        # 默认 GPU 上使用 int8_float16 量化，CPU 上使用 int8 量化
+        if compute_type == "auto":
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+        self.device = device
+        self.compute_type = compute_type
+        self.model = WhisperModel(
+            model,
+            device=device,
+            compute_type=compute_type,
+            # CPU 核心在各推理线程之间平分，避免过度订阅
+            cpu_threads=max(1, (os.cpu_count() or 1) // num_workers),
+            num_workers=num_workers,
+        )
+        # 批量推理：多个 30 秒窗口并行解码
+        self.batched = (
+            BatchedInferencePipeline(model=self.model) if batch_size > 1 else None
+        )
+
+    def transcribe(
+        self, audio: Union[str, np.ndarray], language: Optional[str] = None
+    ) -> Iterator[ASRDataSeg]:
+        # 批量推理依赖 VAD 切分语音段，关闭 VAD 时退回逐段解码
+        if self.batched is not None and self.vad:
+            segments, _ = self.batched.transcribe(
+                audio,
+                language=language,
+                batch_size=self.batch_size,
+                vad_filter=True,
+                # 批量推理会把语音段上限固定为 30 秒窗口；未设置时保留其针对批量推理调优的默认参数
+                vad_parameters=(
+                    {"min_silence_duration_ms": self.min_silence_ms}
+                    if self.min_silence_ms is not None
+                    else None
+                ),
+                condition_on_previous_text=False,
+                beam_size=1,
+            )
+        else:
+            # 先用 Silero VAD 切出不超过 30 秒的语音段，跳过静音部分
+            segments, _ = self.model.transcribe(
+                audio,
+                language=language,
+                vad_filter=self.vad,
+                vad_parameters=self._sequential_vad_parameters() if self.vad else None,
+                condition_on_previous_text=False,
+                beam_size=1,
+            )
+        for segment in segments:
+            yield ASRDataSeg(segment.text, segment.start * 1000, segment.end * 1000)
+
+    def _sequential_vad_parameters(self) -> dict:
+        """逐段解码使用的 VAD 参数"""
+        params = {"max_speech_duration_s": 30}
+        if self.min_silence_ms is not None:
+            params["min_silence_duration_ms"] = self.min_silence_ms
+        return params
+
+    def warmup(self) -> None:
+        # 基类的预热会被 VAD 过滤掉全部静音，这里直接调用模型以确保解码器被执行
+        from faster_whisper.vad import get_speech_timestamps
+
+        logger.info(f"预热 Whisper 模型 ({self.name})...")
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        try:
+            segments, _ = self.model.transcribe(silence, language="en", beam_size=1)
+            list(segments)
+            if self.vad:
+                get_speech_timestamps(silence)
+        except Exception as e:
+            logger.warning(f"Whisper 预热失败: {str(e)}")
+
+
+class WhisperCppBackend(WhisperBackend):
+    """基于 whisper.cpp (pywhispercpp) 的推理后端，适合没有 GPU 的部署"""
+
+    name = "cpp"
+
+    def __init__(self, model: str, n_threads: Optional[int] = None):
+        """
+        加载模型
+
+        Args:
+            model: ggml 模型名称（如 base、base-q8_0）或本地路径
+            n_threads: 推理线程数，默认使用全部 CPU 核心
+        """
+        try:
+            from pywhispercpp.model import Model
+        except ImportError:
+            raise ImportError(
+                "使用 whisper.cpp 后端需要安装 cpp 可选依赖: pip install 'mcp-video-extraction[cpp]'"
+            )
+        self.model = Model(model, n_threads=n_threads or os.cpu_count())
+        # pywhispercpp 的 Model 不是线程安全的，且模型实例会在多个服务之间共享，推理需串行执行
+        self._lock = threading.Lock()
+
+    def transcribe(
+        self, audio: Union[str, np.ndarray], language: Optional[str] = None
+    ) -> Iterator[ASRDataSeg]:
+        # transcribe 一次性返回全部分段，只需在推理期间持有锁
+        with self._lock:
+            segments = self.model.transcribe(audio, language=language or "auto")
+        # whisper.cpp 的时间戳单位为 10 毫秒
+        for segment in segments:
+            yield ASRDataSeg(segment.text, segment.t0 * 10, segment.t1 * 10)
+
+
+def create_whisper_backend(
+    backend: str,
+    model: str,
+    batch_size: int = 16,
+    vad: bool = True,
+    compute_type: str = "auto",
+    device: str = "auto",
+    min_silence_ms: Optional[int] = None,
+    num_workers: int = 1,
+) -> WhisperBackend:
+    """
+    创建本地 Whisper 推理后端
+
+    Args:
+        backend: 后端名称，可选 faster-whisper、cpp
+        model: 模型名称
+        batch_size: 批量推理的批大小（仅 faster-whisper）
+        vad: 是否使用 VAD（仅 faster-whisper）
+        compute_type: 计算类型（仅 faster-whisper）
+        device: 推理设备（仅 faster-whisper）
+        min_silence_ms: VAD 最短静音时长（仅 faster-whisper）
+        num_workers: 可同时执行推理的线程数（仅 faster-whisper，whisper.cpp 固定串行）
+
+    Returns:
+        WhisperBackend: 推理后端实例
+
+    Raises:
+        ValueError: 当后端不支持或 num_workers 小于 1 时
+    """
+    if num_workers < 1:
+        raise ValueError(f"num_workers 必须大于等于 1: {num_workers}")
+    backend = backend.lower()
+    if backend == "faster-whisper":
+        return FasterWhisperBackend(
+            model,
+            batch_size=batch_size,
+            vad=vad,
+            compute_type=compute_type,
+            device=device,
+            min_silence_ms=min_silence_ms,
+            num_workers=num_workers,
+        )
+    elif backend == "cpp":
+        return WhisperCppBackend(model)
+    else:
+        raise ValueError(f"不支持的 Whisper 后端: {backend}")